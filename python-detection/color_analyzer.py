@@ -163,6 +163,46 @@ COLOR_DISPLAY_NAMES = {
     "black": "black",
 }
 
+# Stacked HSV bounds for vectorized range matching, shape (num_colors, 3)
+COLOR_NAMES = list(COLOR_RANGES.keys())
+COLOR_LOWER = np.array([lower for lower, _ in COLOR_RANGES.values()], dtype=np.uint8)
+COLOR_UPPER = np.array([upper for _, upper in COLOR_RANGES.values()], dtype=np.uint8)
+
+# Row width of the packed pixel buffer used for batched analysis
+PACK_WIDTH = 1024
+
+
+def _hsv_cell_tables() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split HSV space into cells along every color range edge
+    
+    Each color range then covers a whole block of cells, so a histogram of
+    cells gives exact per-range pixel counts.
+    
+    Returns:
+        Tuple of (lut, cell_colors): a (256, 1, 3) int32 LUT mapping H, S and V
+        values to offsets that add up to the cell index, and a
+        (num_cells, num_colors) matrix marking which ranges contain each cell
+    """
+    edges = [
+        np.unique(np.concatenate([COLOR_LOWER[:, ch], COLOR_UPPER[:, ch].astype(np.int32) + 1]))
+        for ch in range(3)
+    ]
+    cells = [np.searchsorted(channel_edges, np.arange(256), side="right") for channel_edges in edges]
+    n_h, n_s, n_v = (len(channel_edges) + 1 for channel_edges in edges)
+    
+    lut = np.stack([cells[0] * n_s * n_v, cells[1] * n_v, cells[2]], axis=-1)
+    cell_colors = np.zeros((n_h, n_s, n_v, len(COLOR_NAMES)))
+    for c, (lower, upper) in enumerate(zip(COLOR_LOWER, COLOR_UPPER)):
+        block = tuple(slice(cells[ch][lower[ch]], cells[ch][upper[ch]] + 1) for ch in range(3))
+        cell_colors[block + (c,)] = 1
+    
+    return lut.astype(np.int32).reshape(256, 1, 3), cell_colors.reshape(-1, len(COLOR_NAMES))
+
+
+HSV_CELL_LUT, HSV_CELL_COLORS = _hsv_cell_tables()
+NUM_HSV_CELLS = len(HSV_CELL_COLORS)
+
 
 class ColorAnalyzer:
     """Analyzes colors in image regions for colorblind assistance"""
@@ -189,10 +229,7 @@ class ColorAnalyzer:
         
         color_percentages = {}
         
-        for color_name, (lower, upper) in COLOR_RANGES.items():
-            lower = np.array(lower, dtype=np.uint8)
-            upper = np.array(upper, dtype=np.uint8)
-            
+        for color_name, lower, upper in zip(COLOR_NAMES, COLOR_LOWER, COLOR_UPPER):
             # Create mask for this color
             mask = cv2.inRange(hsv, lower, upper)
             
@@ -217,7 +254,10 @@ class ColorAnalyzer:
             List of dominant color names
         """
         color_percentages = self.detect_colors(roi)
-        
+        return self._rank_colors(color_percentages, top_n)
+    
+    def _rank_colors(self, color_percentages: dict[str, float], top_n: int = 3) -> list[str]:
+        """Turn color percentages into the top N unique display names"""
         # Sort by percentage
         sorted_colors = sorted(
             color_percentages.items(),
@@ -295,11 +335,11 @@ class ColorAnalyzer:
                 "warning": None
             }
         
-        # Detect all colors
+        # Detect all colors (once; dominant colors are ranked from the same result)
         detected_colors = self.detect_colors(roi)
         
         # Get dominant colors
-        dominant = self.get_dominant_colors(roi)
+        dominant = self._rank_colors(detected_colors)
         
         # Check if problematic
         is_problematic, warning = self.is_problematic_for_user(
@@ -314,6 +354,78 @@ class ColorAnalyzer:
             "color_breakdown": detected_colors
         }
     
+    def analyze_regions_batch(
+        self,
+        rois: list[np.ndarray],
+        colorblindness_type: ColorBlindnessType
+    ) -> list[dict]:
+        """
+        Color analysis of many regions in one batched pass
+        
+        The pixels of all ROIs are packed into one buffer for a single HSV
+        conversion. Every pixel is then mapped to an HSV cell (see
+        _hsv_cell_tables), one bincount builds the cell histogram of every ROI,
+        and one matrix product turns those into per-color counts. Results are
+        identical to analyze_region.
+        
+        Args:
+            rois: BGR image regions
+            colorblindness_type: User's colorblindness type
+            
+        Returns:
+            List of analysis results, one per ROI, in the same format as analyze_region
+        """
+        # Empty regions keep the same placeholder result as analyze_region
+        results = [
+            {"dominant_colors": [], "is_problematic": False, "warning": None}
+            for _ in rois
+        ]
+        valid = [i for i, roi in enumerate(rois) if roi.size > 0]
+        
+        if not valid:
+            return results
+        
+        # Pack every ROI's pixels back to back into one preallocated buffer,
+        # shaped as a multi-row image so OpenCV can parallelize over rows
+        n = len(valid)
+        sizes = np.array([rois[i].shape[0] * rois[i].shape[1] for i in valid])
+        ends = np.cumsum(sizes)
+        total = int(ends[-1])
+        rows = -(-total // PACK_WIDTH)
+        pixels = np.zeros((rows * PACK_WIDTH, 3), dtype=np.uint8)
+        for i, start, end in zip(valid, ends - sizes, ends):
+            pixels[start:end].reshape(rois[i].shape)[...] = rois[i]
+        
+        # One HSV conversion for all regions, then map every pixel to its HSV
+        # cell, offset so each ROI gets its own run of cells
+        hsv = cv2.cvtColor(pixels.reshape(rows, PACK_WIDTH, 3), cv2.COLOR_BGR2HSV)
+        offsets = cv2.LUT(hsv.reshape(-1, 1, 3)[:total], HSV_CELL_LUT).reshape(-1, 3)
+        cells = offsets[:, 0] + offsets[:, 1] + offsets[:, 2]
+        cells += np.repeat(np.arange(n, dtype=np.int32) * NUM_HSV_CELLS, sizes)
+        
+        # Histogram the cells of every ROI at once, then add up each color's cells
+        histogram = np.bincount(cells, minlength=n * NUM_HSV_CELLS).reshape(n, NUM_HSV_CELLS)
+        counts = histogram @ HSV_CELL_COLORS  # (N, num_colors)
+        percentages = (counts / sizes[:, np.newaxis]) * 100
+        
+        for row, i in enumerate(valid):
+            detected_colors = {
+                COLOR_NAMES[c]: round(float(percentages[row, c]), 1)
+                for c in np.flatnonzero(percentages[row] > 5)  # Only include if more than 5%
+            }
+            is_problematic, warning = self.is_problematic_for_user(
+                detected_colors,
+                colorblindness_type
+            )
+            results[i] = {
+                "dominant_colors": self._rank_colors(detected_colors),
+                "is_problematic": is_problematic,
+                "warning": warning,
+                "color_breakdown": detected_colors
+            }
+        
+        return results
+    
     def analyze_traffic_light(self, roi: np.ndarray) -> dict:
         """
         Specialized analysis for traffic lights
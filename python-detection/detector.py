@@ -4,6 +4,8 @@ YOLO-based Object Detector using OpenCV DNN
 
 import os
 import logging
+import itertools
+import threading
 import urllib.request
 from pathlib import Path
 from typing import Optional
@@ -61,17 +63,59 @@ RELEVANT_OBJECTS = {
 }
 
 
+# Square network input size for YOLOv3-tiny
+INPUT_SIZE = 416
+
+# Number of input buffers, so one batch can be preprocessed while another runs inference
+INPUT_BUFFERS = 2
+
+# OpenCV DNN backends as (backend, target), in order of preference for backend="auto"
+# CUDA runs FP16 on tensor cores, OpenVINO uses its optimized CPU kernels
+DNN_BACKENDS = {
+    "cuda": (cv2.dnn.DNN_BACKEND_CUDA, cv2.dnn.DNN_TARGET_CUDA_FP16),
+    "openvino": (cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE, cv2.dnn.DNN_TARGET_CPU),
+    "cpu": (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU),
+}
+
+
 class ObjectDetector:
     """YOLO-based object detector using OpenCV DNN"""
     
-    def __init__(self, model_dir: str = "models"):
+    def __init__(self, model_dir: str = "models", backend: str = "auto", max_batch: int = 8):
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(exist_ok=True)
+        self.backend = backend.lower()
         
         self.net: Optional[cv2.dnn.Net] = None
         self.output_layers: list = []
         self.classes = COCO_CLASSES
         
+        # Batches run at a few fixed sizes (powers of two up to max_batch), with
+        # smaller batches padded up to the next one. cv2.dnn reallocates a network
+        # whenever its input shape changes, and CUDA/OpenVINO re-initialize too,
+        # so each size gets its own network that keeps a single input shape.
+        max_batch = max(1, max_batch)
+        self.batch_sizes = sorted({min(1 << i, max_batch) for i in range(max_batch.bit_length() + 1)})
+        self._nets: dict[int, cv2.dnn.Net] = {}
+        
+        # Double-buffered preprocessing buffers, reused across calls instead of
+        # reallocated per frame. Each buffer has its own lock so frames for the
+        # next batch can be resized while the network runs on the current one.
+        # Zero-filled so padding entries start as blank frames.
+        self._input_blobs = [
+            np.zeros((max_batch, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+            for _ in range(INPUT_BUFFERS)
+        ]
+        self._resized = [
+            np.empty((INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+            for _ in range(INPUT_BUFFERS)
+        ]
+        self._buffer_locks = [threading.Lock() for _ in range(INPUT_BUFFERS)]
+        self._next_buffer = itertools.count()
+        
+        # Guards the networks, which are not thread-safe
+        self._net_lock = threading.Lock()
+        
         self._load_model()
     
     def _download_file(self, url: str, filepath: Path) -> bool:
@@ -103,6 +147,42 @@ class ObjectDetector:
         
         return weights_path, config_path
     
+    def _select_backend(self) -> str:
+        """Pick the requested DNN backend, or the fastest one this OpenCV build supports"""
+        if self.backend == "auto":
+            candidates = list(DNN_BACKENDS)
+        else:
+            candidates = [self.backend, "cpu"]
+        
+        selected = "cpu"
+        for name in candidates:
+            if name not in DNN_BACKENDS:
+                logger.warning(f"Unknown DNN backend: {name}")
+                continue
+            backend, target = DNN_BACKENDS[name]
+            try:
+                if target in cv2.dnn.getAvailableTargets(backend):
+                    selected = name
+                    break
+            except cv2.error:
+                continue
+        
+        if self.backend != "auto" and selected != self.backend:
+            logger.warning(f"DNN backend {self.backend} is not available, falling back to {selected}")
+        return selected
+    
+    def _set_backend(self, backend_name: str):
+        """Point every network at a DNN backend and run it once at each batch size"""
+        backend, target = DNN_BACKENDS[backend_name]
+        for size, net in self._nets.items():
+            net.setPreferableBackend(backend)
+            net.setPreferableTarget(target)
+            # The first forward pass allocates the network and, for CUDA and
+            # OpenVINO, initializes the backend. Do it now rather than on the
+            # first requests; the input shape never changes afterwards.
+            net.setInput(self._input_blobs[0][:size])
+            net.forward(self.output_layers)
+    
     def _load_model(self):
         """Load YOLO model"""
         try:
@@ -112,22 +192,33 @@ class ObjectDetector:
                 logger.error("Model files not available")
                 return
             
-            # Load network
-            self.net = cv2.dnn.readNet(str(weights_path), str(config_path))
-            
-            # Use CPU (change to CUDA if GPU available)
-            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            # Load one network per batch size
+            for size in self.batch_sizes:
+                self._nets[size] = cv2.dnn.readNet(str(weights_path), str(config_path))
+            self.net = self._nets[self.batch_sizes[0]]
             
             # Get output layer names
             layer_names = self.net.getLayerNames()
             self.output_layers = [layer_names[i - 1] for i in self.net.getUnconnectedOutLayers()]
             
-            logger.info("YOLO model loaded successfully")
+            # Use the fastest available backend (CUDA FP16, OpenVINO, then plain CPU),
+            # falling back to CPU if it is listed but fails to run
+            backend_name = self._select_backend()
+            try:
+                self._set_backend(backend_name)
+            except cv2.error as e:
+                if backend_name == "cpu":
+                    raise
+                logger.warning(f"DNN backend {backend_name} failed to initialize, falling back to cpu: {e}")
+                backend_name = "cpu"
+                self._set_backend(backend_name)
+            
+            logger.info(f"YOLO model loaded successfully (backend: {backend_name})")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             self.net = None
+            self._nets = {}
     
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
@@ -149,21 +240,99 @@ class ObjectDetector:
             return []
         
         height, width = frame.shape[:2]
-        logger.info(f"Frame size: {width}x{height}")
+        logger.debug("Frame size: %dx%d", width, height)
+        
+        # Create blob from image and run forward pass
+        outputs = self._forward([frame])
+        
+        return self._process_outputs(outputs, width, height, confidence_threshold)
+
+    def detect_batch(self, frames: list[np.ndarray], confidence_thresholds: list[float]) -> list[list[dict]]:
+        """
+        Detect objects in several frames with a single forward pass
+        
+        Args:
+            frames: BGR images as numpy arrays (any size, each is resized to the network input)
+            confidence_thresholds: Minimum confidence for each frame
+            
+        Returns:
+            List of per-frame detection lists, in the same order as frames
+        """
+        if not self.is_loaded():
+            logger.warning("Model not loaded, cannot detect")
+            return [[] for _ in frames]
+        
+        largest = self.batch_sizes[-1]
+        if len(frames) > largest:
+            return (self.detect_batch(frames[:largest], confidence_thresholds[:largest]) +
+                    self.detect_batch(frames[largest:], confidence_thresholds[largest:]))
+        
+        # Every frame is stretched to the same network input size, so
+        # heterogeneous frame sizes can share one NCHW blob
+        outputs = self._forward(frames)
         
-        # Create blob from image
-        blob = cv2.dnn.blobFromImage(
-            frame, 
-            scalefactor=1/255.0,
-            size=(416, 416),
-            swapRB=True,
-            crop=False
-        )
+        # OpenCV drops the batch axis when the batch size is 1. Outputs past
+        # len(frames) belong to padding and are never read.
+        if outputs[0].ndim == 2:
+            outputs = [output[np.newaxis] for output in outputs]
         
-        # Run forward pass
-        self.net.setInput(blob)
-        outputs = self.net.forward(self.output_layers)
+        results = []
+        for i, (frame, confidence_threshold) in enumerate(zip(frames, confidence_thresholds)):
+            height, width = frame.shape[:2]
+            frame_outputs = [output[i] for output in outputs]
+            results.append(self._process_outputs(frame_outputs, width, height, confidence_threshold))
         
+        return results
+
+    def _forward(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Preprocess frames into the next input buffer and run the network on them
+        
+        The batch is padded up to the next size in self.batch_sizes and run on
+        that size's network. Preprocessing only holds the buffer's lock, so it
+        overlaps with a forward pass running on the other buffer. Post-processing
+        is left to the caller and runs outside both locks.
+        """
+        batch_size = next(size for size in self.batch_sizes if size >= len(frames))
+        slot = next(self._next_buffer) % INPUT_BUFFERS
+        with self._buffer_locks[slot]:
+            blob = self._prepare_blob(frames, slot, batch_size)
+            with self._net_lock:
+                net = self._nets[batch_size]
+                net.setInput(blob)
+                return net.forward(self.output_layers)
+
+    def _prepare_blob(self, frames: list[np.ndarray], slot: int, batch_size: int) -> np.ndarray:
+        """
+        Fill a reusable input blob with frames resized to the network input
+        
+        Equivalent to cv2.dnn.blobFromImages(frames, 1/255, (INPUT_SIZE, INPUT_SIZE),
+        swapRB=True), but writes into preallocated buffers. Caller must hold
+        self._buffer_locks[slot].
+        
+        Args:
+            frames: BGR images as numpy arrays
+            slot: Index of the input buffer to fill
+            batch_size: Padded batch size, at least len(frames)
+            
+        Returns:
+            NCHW float32 view of the input blob covering batch_size images. Entries
+            past len(frames) are padding and may hold stale frames.
+        """
+        input_blob = self._input_blobs[slot]
+        resized = self._resized[slot]
+        
+        for i, frame in enumerate(frames):
+            cv2.resize(frame, (INPUT_SIZE, INPUT_SIZE), dst=resized)
+            # BGR->RGB, HWC->CHW, uint8->float32 and 1/255 scaling in a single
+            # pass: the channel swap and transpose are just strided views
+            np.multiply(resized.transpose(2, 0, 1)[::-1], np.float32(1 / 255.0),
+                        out=input_blob[i], casting="unsafe")
+        
+        return input_blob[:batch_size]
+
+    def _process_outputs(self, outputs, width: int, height: int, confidence_threshold: float) -> list[dict]:
+        """Convert raw YOLO outputs for one frame into NMS-filtered detections"""
         # Process detections
         boxes = []
         confidences = []